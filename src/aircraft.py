@@ -1,43 +1,105 @@
 from PySide6.QtCore import QPointF
 from PySide6.QtGui import QVector2D
-from typing import List
-from math import cos, sin, radians, dist
-from copy import copy
+from typing import Deque
+from collections import deque
+from math import cos, sin, radians, hypot
+import numpy as np
 
 class Aircraft:
-    """Aircraft"""
+    """Aircraft, view of its row in simulation state arrays shared by all aircrafts"""
     aircraft_id: int
-    yaw_angle : float
     pitch_angle : float
     roll_angle : float
     set_speed : float
-    speed : float
-    course : float
-    position : QPointF
+    cos_yaw : float
+    sin_yaw : float
     distance_covered : float
     size : float = 40.0
     max_course_change : float = 1.5
     speedstep : float = 0.05
     safezone_size : float = 1000.0
-    safezone_occupied: bool
-    path: List[QPointF]
+    path: Deque[QPointF]
+    path_max_points : int = 101 # only last 100 segments of travelled path are kept to prevent lag
     path_append_iterator : float
+    directions : tuple[tuple[float, float], ...] = tuple((cos(radians(angle)), sin(radians(angle))) for angle in range(360)) # for whole degrees
 
-    def __init__(self, aircraft_id, position, yaw_angle, speed) -> None:
-        """Initializes the aircraft"""
+    @staticmethod
+    def create_state(count : int) -> dict[str, np.ndarray]:
+        """Allocates state arrays for given number of aircrafts, indexed by aircraft id"""
+        return {
+            "position": np.zeros((count, 2)),
+            "yaw_angle": np.zeros(count),
+            "course": np.zeros(count),
+            "speed": np.zeros(count),
+            "size": np.full(count, Aircraft.size),
+            "safezone_size": np.full(count, Aircraft.safezone_size),
+            "safezone_occupied": np.zeros(count, dtype=np.uint8)
+        }
+
+    def __init__(self, aircraft_id, state, position, yaw_angle, speed) -> None:
+        """Initializes the aircraft in given row of state arrays"""
         self.aircraft_id = aircraft_id
+        self._state = state
         self.yaw_angle = yaw_angle
         self.pitch_angle = 0.0
         self.roll_angle = 0.0
         self.speed = speed
         self.set_speed = speed
         self.course = self.yaw_angle
+        self.update_yaw_direction()
+        self._direction_course : float | None = None
+        self._course_direction : tuple[float, float] = (1.0, 0.0)
         self.position = position
         self.distance_covered = 0.0
-        self.safezone_occupied = False # todo: change to int
-        self.path = []
+        self.safezone_occupied = False
+        self.path = deque(maxlen=self.path_max_points)
         self.path_append_iterator = 0.0
 
+    @property
+    def position(self) -> QPointF:
+        """Position of the aircraft, modifying returned point does not move the aircraft"""
+        return QPointF(*self._state["position"][self.aircraft_id])
+
+    @position.setter
+    def position(self, position : QPointF) -> None:
+        self._state["position"][self.aircraft_id] = position.toTuple()
+
+    @property
+    def yaw_angle(self) -> float:
+        """Yaw angle of the aircraft in degrees"""
+        return float(self._state["yaw_angle"][self.aircraft_id])
+
+    @yaw_angle.setter
+    def yaw_angle(self, yaw_angle : float) -> None:
+        self._state["yaw_angle"][self.aircraft_id] = yaw_angle
+
+    @property
+    def course(self) -> float:
+        """Set course of the aircraft in degrees"""
+        return float(self._state["course"][self.aircraft_id])
+
+    @course.setter
+    def course(self, course : float) -> None:
+        self._state["course"][self.aircraft_id] = course
+
+    @property
+    def speed(self) -> float:
+        """Current speed of the aircraft"""
+        return float(self._state["speed"][self.aircraft_id])
+
+    @speed.setter
+    def speed(self, speed : float) -> None:
+        self._state["speed"][self.aircraft_id] = speed
+
+    @property
+    def safezone_occupied(self) -> bool:
+        """Whether another aircraft is inside the safezone"""
+        return bool(self._state["safezone_occupied"][self.aircraft_id])
+
+    @safezone_occupied.setter
+    def safezone_occupied(self, safezone_occupied : bool) -> None:
+        self._state["safezone_occupied"][self.aircraft_id] = safezone_occupied
+
     def update_course(self) -> None:
         """Applies gradual change to yaw angle respecting set course"""
         # todo: replace with algorithm
@@ -63,7 +125,27 @@ class Aircraft:
                 new_yaw_angle -= self.max_course_change
         new_yaw_angle %= 360
         self.yaw_angle = new_yaw_angle
+        self.update_yaw_direction()
         return
+
+    @staticmethod
+    def get_direction(angle : float) -> tuple[float, float]:
+        """Returns cosine and sine of angle in degrees, looked up for whole degrees which steering uses the most"""
+        if angle.is_integer():
+            return Aircraft.directions[int(angle) % 360]
+        return (cos(radians(angle)), sin(radians(angle)))
+
+    def update_yaw_direction(self) -> None:
+        """Caches cosine and sine of yaw angle, which changes only along with course adjustment"""
+        self.cos_yaw, self.sin_yaw = self.get_direction(self.yaw_angle)
+        return
+
+    def get_course_direction(self) -> tuple[float, float]:
+        """Returns cosine and sine of set course, recomputed only after the course has changed"""
+        if self.course != self._direction_course:
+            self._direction_course = self.course
+            self._course_direction = self.get_direction(self.course)
+        return self._course_direction
     
     def update_speed(self) -> None:
         """A"""
@@ -87,22 +169,24 @@ class Aircraft:
         self.update_course()
 
         # todo: change to matrix
-        previous_position : QPointF = copy(self.position)
         speed_vector = self.get_speed_vector()
-        self.position.setX(self.position.x() + speed_vector.x())
-        self.position.setY(self.position.y() + speed_vector.y())
+        delta_x = speed_vector.x()
+        delta_y = speed_vector.y()
+        position = self._state["position"][self.aircraft_id]
+        position[0] += delta_x
+        position[1] += delta_y
         
         # distance covered
-        distance = dist(previous_position.toTuple(), self.position.toTuple())
+        distance = hypot(delta_x, delta_y)
         self.distance_covered += distance
         
         # path
         self.path_append_iterator += distance
         if self.path_append_iterator >= 3.5:
-            self.path.append(copy(self.position))
+            self.path.append(self.position)
             self.path_append_iterator = 0
         return
 
     def get_speed_vector(self) -> QVector2D:
         """Returns speed vector of the aircraft"""
-        return QVector2D(self.speed * cos(radians(self.yaw_angle)), self.speed * sin(radians(self.yaw_angle)))
+        return QVector2D(self.speed * self.cos_yaw, self.speed * self.sin_yaw)
@@ -0,0 +1,34 @@
+import numpy as np
+from numba import njit
+
+@njit(cache=True, fastmath=True)
+def tick_checks(positions, sizes, safezone_sizes, safezone_occupied, width, height):
+    """Checks collisions, simulation boundaries and safezones of all aircrafts in a single pass.
+    Returns collision flag, boundaries flag and masks of entered and left safezones.
+    Stops at first collision, reporting no safezone changes as simulation ends anyway"""
+    n = positions.shape[0]
+    offscreen = False
+    occupied = np.zeros(n, dtype=np.uint8)
+    entered = np.zeros(n, dtype=np.uint8)
+    left = np.zeros(n, dtype=np.uint8)
+    for i in range(n):
+        x = positions[i, 0]
+        y = positions[i, 1]
+        half_size = sizes[i] / 2
+        if x < half_size or x > width - half_size or y < half_size or y > height - half_size:
+            offscreen = True
+        for j in range(i + 1, n):
+            dx = x - positions[j, 0]
+            dy = y - positions[j, 1]
+            distance_squared = dx * dx + dy * dy
+            occupied[i] |= distance_squared <= safezone_sizes[i] * safezone_sizes[i] / 4
+            occupied[j] |= distance_squared <= safezone_sizes[j] * safezone_sizes[j] / 4
+            collision_distance = (sizes[i] + sizes[j]) / 2
+            if distance_squared <= collision_distance * collision_distance:
+                return True, offscreen, entered, left
+
+    # transitions from previous occupancy without branching on it
+    for i in range(n):
+        entered[i] = occupied[i] & ~safezone_occupied[i] & 1
+        left[i] = ~occupied[i] & safezone_occupied[i] & 1
+    return False, offscreen, entered, left
@@ -0,0 +1,62 @@
+from PySide6.QtCore import Qt, QRectF, QLineF
+from PySide6.QtGui import QPen, QPolygonF
+from PySide6.QtWidgets import QGraphicsItem
+
+class OverlayItem(QGraphicsItem):
+    """Scene item drawing all lines, circles and polygons of the simulation overlay in batches.
+    Contents are collected every frame with add methods, drawing happens later in paint"""
+    def __init__(self, rect : QRectF) -> None:
+        """Initializes the overlay covering given rect"""
+        super().__init__()
+        self.rect = rect
+        self.pen = QPen() # used for circles and polygons
+        self.clear()
+        return
+
+    def clear(self) -> None:
+        """Removes everything collected for previous frame"""
+        self._lines : dict[int, tuple[QPen, list[QLineF]]] = {} # batches of lines by pen
+        self._polylines : list[tuple[QPen, QPolygonF]] = []
+        self._ellipses : list[QRectF] = []
+        self._polygons : list[QPolygonF] = []
+        return
+
+    def add_line(self, pen : QPen, line : QLineF) -> None:
+        """Adds line to the batch drawn with given pen"""
+        self._lines.setdefault(id(pen), (pen, []))[1].append(line)
+        return
+
+    def add_polyline(self, pen : QPen, polyline : QPolygonF) -> None:
+        """Adds open polyline drawn with given pen"""
+        self._polylines.append((pen, polyline))
+        return
+
+    def add_ellipse(self, rect : QRectF) -> None:
+        """Adds ellipse inscribed in given rect"""
+        self._ellipses.append(rect)
+        return
+
+    def add_polygon(self, polygon : QPolygonF) -> None:
+        """Adds closed polygon"""
+        self._polygons.append(polygon)
+        return
+
+    def boundingRect(self) -> QRectF:
+        """Qt method returning area the overlay may draw in"""
+        return self.rect
+
+    def paint(self, painter, option, widget=None) -> None:
+        """Qt method drawing collected contents with as few painter calls as possible"""
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(self.pen)
+        for rect in self._ellipses:
+            painter.drawEllipse(rect)
+        for polygon in self._polygons:
+            painter.drawPolygon(polygon)
+        for pen, polyline in self._polylines:
+            painter.setPen(pen)
+            painter.drawPolyline(polyline)
+        for pen, lines in self._lines.values():
+            painter.setPen(pen)
+            painter.drawLines(lines)
+        return
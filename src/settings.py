@@ -2,6 +2,7 @@ class Settings:
     """Settings"""
     resolution = (1100, 900)  # default resolution
     refresh_rate = 60  # default refresh rate
+    opengl_viewport = True  # render scene on the GPU
 
     @classmethod
     def set_resolution(cls, width, height) -> None:
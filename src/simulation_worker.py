@@ -0,0 +1,32 @@
+from PySide6.QtCore import Qt, QObject, QTimer, QMutex, QMutexLocker, Slot
+from typing import Callable
+
+class SimulationWorker(QObject):
+    """Runs simulation updates on its own timer, meant to be moved to a separate thread"""
+    def __init__(self, update : Callable[[], None], mutex : QMutex) -> None:
+        """Initializes the worker with update to be called every tick and mutex guarding simulation state"""
+        super().__init__()
+        self.update = update
+        self.mutex = mutex
+        self.timer = QTimer(self) # moved to worker thread along with its parent
+        self.timer.timeout.connect(self.tick, Qt.ConnectionType.DirectConnection)
+        return
+
+    @Slot(int)
+    def start(self, interval : int) -> None:
+        """Starts ticking with given interval in miliseconds"""
+        self.timer.start(interval)
+        return
+
+    @Slot()
+    def stop(self) -> None:
+        """Stops ticking"""
+        self.timer.stop()
+        return
+
+    @Slot()
+    def tick(self) -> None:
+        """Updates simulation holding the state lock"""
+        with QMutexLocker(self.mutex):
+            self.update()
+        return
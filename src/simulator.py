@@ -1,25 +1,43 @@
-from PySide6.QtCore import Qt, QTimer, QPointF
-from PySide6.QtWidgets import QMainWindow, QGraphicsScene, QGraphicsView, QGraphicsRectItem, QGraphicsLineItem, QGraphicsSimpleTextItem, QGraphicsEllipseItem, QGraphicsPixmapItem, QGraphicsPolygonItem
-from PySide6.QtGui import QPen, QKeySequence, QPixmap, QTransform, QVector2D, QPolygonF
+from PySide6.QtCore import Qt, QTimer, QPointF, QRectF, QLineF, QThread, QMutex, QMutexLocker, Signal
+from PySide6.QtWidgets import QMainWindow, QGraphicsScene, QGraphicsView, QGraphicsItem, QGraphicsRectItem, QGraphicsSimpleTextItem, QGraphicsPixmapItem, QGraphicsPathItem
+from PySide6.QtGui import QPen, QKeySequence, QPixmap, QTransform, QVector2D, QPolygonF, QPainterPath, QPainter
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
 from src.aircraft import Aircraft
 from src.settings import Settings
 from src.fps_counter import FPSCounter
-from math import radians, sin, cos, atan2, degrees, dist, sqrt
+from src.simulation_worker import SimulationWorker
+from src.overlay_item import OverlayItem
+from src.kernels import tick_checks
+from itertools import islice
+from typing import Callable
+from collections import deque
+from math import atan2, degrees, sqrt
+import numpy as np
+from scipy.spatial import cKDTree
 
 class Simulator(QMainWindow):
     """Main simulation App"""
+    spatial_index_threshold : int = 16 # aircraft count from which pairs are found with KD-tree instead of brute force
+    start_simulation_timer = Signal(int)
+    stop_simulation_timer = Signal()
+
     def __init__(self) -> None:
         super().__init__()
 
         self.resolution = Settings.resolution
         self.bounding_box_resolution = [Settings.resolution[0], Settings.resolution[1]]
+        self._bounds : np.ndarray = np.array(self.resolution, dtype=float) # simulation boundaries as width and height
         self.refresh_rate = Settings.refresh_rate
 
         self.setWindowTitle("UAV Flight Simulator")
         self.setGeometry(0, 0, self.resolution[0] + 10, self.resolution[1] + 10)
 
         self.scene = QGraphicsScene()
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex) # most items move every frame
         self.view = QGraphicsView(self.scene, self)
+        if Settings.opengl_viewport:
+            self.view.setViewport(QOpenGLWidget())
+        self.view.setRenderHint(QPainter.RenderHint.Antialiasing, False)
         self.setCentralWidget(self.view)
 
         self.debug : bool = True
@@ -32,489 +50,561 @@ class Simulator(QMainWindow):
         self.cause_crash_second : bool = False
         self.display_hitboxes : bool = True
         self.display_speed_vectors : bool = True
+        self._keymap : dict[int, Callable[[], None]] = self.create_keymap()
+        self.log_lines : int = 5 # number of latest log messages shown in debug mode
+        self._log : deque[str] = deque(maxlen=256) # messages of simulation events, kept instead of printing in its loop
+        self._log_count : int = 0 # number of messages logged so far, including ones dropped from the log
+        self._text_keys : dict[QGraphicsSimpleTextItem, object] = {} # values each text item was last formatted from
 
         self.aircraft_image = QPixmap()
         self.aircraft_image.load("src/assets/aircraft.png")
-
-        self.frame_time : float = 1000 // self.refresh_rate # in miliseconds
-        self.simulation_threshold : float = self.frame_time # in miliseconds
+        self._scaled_pixmap = self.aircraft_image.scaled(40, 40, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        self._path_pens : dict[int | str, QPen] = {
+            0: QPen(Qt.GlobalColor.magenta, 1),
+            1: QPen(Qt.GlobalColor.blue, 1),
+            "default": QPen(Qt.GlobalColor.cyan, 1)
+        }
+        self._course_pen = QPen()
+        self._diagonal_course_pen = QPen(Qt.GlobalColor.green)
+        self._yaw_pen = QPen(Qt.GlobalColor.red)
+        self._speed_vector_pen = QPen(Qt.GlobalColor.blue)
+        self._opponent_vector_pen = QPen(Qt.GlobalColor.red)
+        self._relative_line_pen = QPen(Qt.GlobalColor.green)
+        self._aircraft_items : list[QGraphicsItem] = []
+        self.create_scene_items()
+
+        self.frame_time : int = int(1000 // self.refresh_rate) # in miliseconds
+        self.simulation_threshold : int = self.frame_time # in miliseconds
         self.gui_timer = QTimer(self)
-        self.simulation_timer = QTimer(self)
         self.gui_fps_counter = FPSCounter()
         self.simulation_fps_counter = FPSCounter()
         self.gui_timer.timeout.connect(self.render_scene)
-        self.simulation_timer.timeout.connect(self.update_simulation)
         self.gui_timer.start(self.frame_time)
+
+        # simulation runs in its own thread, so slow painting does not delay its ticks
+        self.state_mutex = QMutex() # guards aircrafts and simulation flags shared by both threads
+        self._simulation_thread = QThread(self)
+        self._simulation_worker = SimulationWorker(self.update_simulation, self.state_mutex)
+        self._simulation_worker.moveToThread(self._simulation_thread)
+        self.start_simulation_timer.connect(self._simulation_worker.start)
+        self.stop_simulation_timer.connect(self._simulation_worker.stop)
+        self._simulation_thread.finished.connect(self._simulation_worker.stop)
+        self._simulation_thread.start()
         self.current_simulation_fps : float = 0.0
     
         self.is_stopped : bool = False
         self.is_finished : bool = False
         self.aircrafts : list(Aircraft) = []
+        self._state : dict[str, np.ndarray] = Aircraft.create_state(0) # state arrays of all aircrafts, see Aircraft.create_state
+        self._tree : cKDTree | None = None # spatial index over positions, used instead of brute force for many aircrafts
+        self._safezone_entered : np.ndarray = np.empty(0, dtype=np.uint8) # per tick results of run_checks
+        self._safezone_left : np.ndarray = np.empty(0, dtype=np.uint8)
+        self._collided : bool = False
+        self._offscreen : bool = False
         self.reset_simulation()
+        self.run_checks() # compiles the kernel so that first tick does not stall
         self.start_simulation()
         self.show()
         return
 
     def update_simulation(self) -> None:
         """Updates simulation looping through aircrafts, checks collisions with another objects and with simulation boundaries"""
-        self.current_simulation_fps = self.simulation_fps_counter.count_frame()
+        # ticks already queued or waiting for the lock when simulation got stopped still arrive, as the worker timer stops asynchronously
+        if self.is_stopped:
+            return
+        self.current_simulation_fps = self.simulation_fps_counter.count_frame() if self.debug else 0.0 # displayed in debug mode only
         for aircraft in self.aircrafts:
             aircraft.update_position()
+        self.update_spatial_index()
+        self.run_checks()
 
         self.check_safezones()
 
-        self.is_stopped = self.check_collision()
-        if self.is_stopped:
+        # both checks stop the simulation themselves
+        if self.check_collision():
             return
         
-        self.is_stopped = self.check_offscreen()
-        if self.is_stopped:
+        if self.check_offscreen():
             return
         
         if self.cause_crash_second:
             self.cause_collision()
         return
 
-    def avoid_aircraft_collision(self, aircraft_id : int) -> None:
-        """Detects and schedules avoid maneuver for given aircraft. Assumes two aircrafts"""
-        if not len(self.aircrafts) >= 1:
-            print("Collision avoidance method called but there are no possible collisions.")
-            return
-        elif not len(self.aircrafts) <= 2:
-            print("Collision avoidance method called but there are three or more aircrafts with possible collisions.")
-            return
-        aircraft = self.aircrafts[aircraft_id]
-        if not aircraft.aircraft_id == aircraft_id:
-            raise Exception("Aircraft ids are not the same. Closing...")
-        
+    def avoid_aircraft_collision(self, aircraft_id : int, delta_x : float, delta_y : float, distance_squared : float) -> None:
+        """Schedules avoid maneuver for given aircraft from its position relative to the other one. Assumes two aircrafts"""
         # conflict detection
-        relative_distance = dist(self.aircrafts[aircraft_id].position.toTuple(), self.aircrafts[1 - aircraft_id].position.toTuple())
-        relative_distance_vector = QVector2D(
-            self.aircrafts[aircraft_id].position.x() - self.aircrafts[1 - aircraft_id].position.x(),
-            self.aircrafts[aircraft_id].position.y() - self.aircrafts[1 - aircraft_id].position.y())
-        print(f"Relative distance: {relative_distance:.2f}")
-        print(f"Relative distance vector: {relative_distance_vector.toPoint().x():.2f}, {relative_distance_vector.toPoint().y():.2f}")
+        if self.debug:
+            self.log(f"Relative distance: {sqrt(distance_squared):.2f}")
+            self.log(f"Relative distance vector: {delta_x:.2f}, {delta_y:.2f}")
 
         # conflict resolution
         
         return
 
+    def log(self, message : str) -> None:
+        """Stores message about simulation event to be displayed in debug mode"""
+        self._log.append(message)
+        self._log_count += 1
+        return
+
+    def update_text(self, item : QGraphicsSimpleTextItem, key, text : Callable[[], str]) -> None:
+        """Sets text of the item only if key, the values the text is formatted from, changed since last update"""
+        if self._text_keys.get(item) != key:
+            self._text_keys[item] = key
+            item.setText(text())
+        return
+
     def reset_simulation(self) -> None:
         """Resets drawn paths and resets aircrafts"""
         for aircraft in self.aircrafts:
             aircraft.path.clear()
         self.aircrafts.clear() 
+        self._state = Aircraft.create_state(2)
         self.aircrafts = [
-            Aircraft(0, position=QPointF(100, 700), yaw_angle=315, speed=2.5),
-            Aircraft(1, position=QPointF(700, 800), yaw_angle=270, speed=2)
+            Aircraft(0, self._state, position=QPointF(100, 700), yaw_angle=315, speed=2.5),
+            Aircraft(1, self._state, position=QPointF(700, 800), yaw_angle=270, speed=2)
         ]
+        self.create_aircraft_items()
+        self.update_spatial_index()
         self.is_finished = False
         return
 
     def start_simulation(self) -> None:
         """Starts all timers"""
         self.is_stopped = False
-        self.simulation_timer.start(self.simulation_threshold)
+        self.start_simulation_timer.emit(self.simulation_threshold)
         return
     
     def stop_simulation(self) -> None:
         """Stops all timers"""
-        self.simulation_timer.stop()
+        self.stop_simulation_timer.emit()
         self.is_stopped = True
         self.current_simulation_fps = 0.0
         return
 
+    def update_spatial_index(self) -> None:
+        """Rebuilds spatial index on current aircraft positions, if there are enough aircrafts to use it"""
+        if len(self.aircrafts) < self.spatial_index_threshold:
+            self._tree = None
+        else:
+            self._tree = cKDTree(self._state["position"])
+        return
+
+    def query_pairs(self, radius : float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns indices of aircraft pairs closer than radius and squared distances between them, using spatial index"""
+        positions = self._state["position"]
+        pairs = self._tree.query_pairs(r=radius, output_type="ndarray")
+        i, j = pairs[:, 0], pairs[:, 1]
+        delta = positions[i] - positions[j]
+        return i, j, (delta * delta).sum(axis=1)
+
+    def run_checks(self) -> None:
+        """Computes safezone transitions, collisions and leaving simulation boundaries for current positions"""
+        positions = self._state["position"]
+        sizes = self._state["size"]
+        safezone_sizes = self._state["safezone_size"]
+        safezone_occupied = self._state["safezone_occupied"]
+        if self._tree is None:
+            self._collided, self._offscreen, self._safezone_entered, self._safezone_left = tick_checks(
+                positions,
+                sizes,
+                safezone_sizes,
+                safezone_occupied,
+                self.resolution[0],
+                self.resolution[1])
+            return
+
+        # one query for both checks, radius covers the biggest safezone and the biggest collision distance
+        i, j, distance_squared = self.query_pairs(max(safezone_sizes.max() / 2, sizes.max()))
+        self._collided = bool((distance_squared <= ((sizes[i] + sizes[j]) / 2) ** 2).any())
+
+        safezone_radii_squared = (safezone_sizes / 2) ** 2
+        occupied = np.zeros(len(self.aircrafts), dtype=np.uint8)
+        occupied[i[distance_squared <= safezone_radii_squared[i]]] = 1
+        occupied[j[distance_squared <= safezone_radii_squared[j]]] = 1
+        self._safezone_entered = occupied & ~safezone_occupied & 1
+        self._safezone_left = ~occupied & safezone_occupied & 1
+
+        half_sizes = sizes[:, None] / 2
+        self._offscreen = bool(((positions < half_sizes) | (positions > self._bounds - half_sizes)).any())
+        return
+
     def check_safezones(self) -> None:
         """Checks if safezones are entered by another aircrafts"""
-        for i in range(len(self.aircrafts) - 1):
-            for j in range(i + 1, len(self.aircrafts)):
-                distance = dist(self.aircrafts[i].position.toTuple(), self.aircrafts[j].position.toTuple())
-                if distance <= self.aircrafts[i].safezone_size / 2:
-                    if not self.aircrafts[i].safezone_occupied:
-                        self.aircrafts[i].safezone_occupied = True
-                        self.avoid_aircraft_collision(self.aircrafts[i].aircraft_id)
-                        print("Some object entered safezone of Aircraft ", self.aircrafts[i].aircraft_id)
-                else:
-                    if self.aircrafts[i].safezone_occupied:
-                        self.aircrafts[i].safezone_occupied = False
-                        print("Some object left safezone of Aircraft ", self.aircrafts[i].aircraft_id)
-                if distance <= self.aircrafts[j].safezone_size / 2:
-                    if not self.aircrafts[j].safezone_occupied:
-                        self.aircrafts[j].safezone_occupied = True
-                        self.avoid_aircraft_collision(self.aircrafts[j].aircraft_id)
-                        print("Some object entered safezone of Aircraft ", self.aircrafts[j].aircraft_id)
-                else:
-                    if self.aircrafts[j].safezone_occupied:
-                        self.aircrafts[j].safezone_occupied = False
-                        print("Some object left safezone of Aircraft ", self.aircrafts[j].aircraft_id)
+        # entering or leaving flips the occupancy, other aircrafts are left untouched
+        self._state["safezone_occupied"] ^= self._safezone_entered | self._safezone_left
+        positions = self._state["position"]
+        is_pair = len(self.aircrafts) == 2 # avoidance is specialized for two aircrafts, where the intruder is always the other one
+        for i in np.flatnonzero(self._safezone_entered):
+            if is_pair:
+                delta_x, delta_y = positions[i] - positions[1 - i]
+                self.avoid_aircraft_collision(self.aircrafts[i].aircraft_id, delta_x, delta_y, delta_x * delta_x + delta_y * delta_y)
+            self.log(f"Some object entered safezone of Aircraft {self.aircrafts[i].aircraft_id}")
+        for i in np.flatnonzero(self._safezone_left):
+            self.log(f"Some object left safezone of Aircraft {self.aircrafts[i].aircraft_id}")
         return
 
     def check_collision(self) -> bool:
         """Checks and returns if any of the aircrafts collided with each other"""
-        for i in range(len(self.aircrafts) - 1):
-            for j in range(i + 1, len(self.aircrafts)):
-                distance = dist(self.aircrafts[i].position.toTuple(), self.aircrafts[j].position.toTuple())
-                if distance <= ((self.aircrafts[i].size + self.aircrafts[j].size) / 2):
-                    self.stop_simulation()
-                    self.is_finished = True
-                    print("Aircrafts collided. Simulation stopped")
-                    return True
+        if self._collided:
+            self.stop_simulation()
+            self.is_finished = True
+            self.log("Aircrafts collided. Simulation stopped")
+            return True
         return False
 
     def check_offscreen(self) -> bool:
         """Checks and returns if any of the aircrafts collided with simulation boundaries"""
-        for aircraft in self.aircrafts:
-            if not (0 + aircraft.size / 2 <= aircraft.position.x() <= self.resolution[0] - aircraft.size / 2 and 0 + aircraft.size / 2 <= aircraft.position.y() <= self.resolution[1] - aircraft.size / 2):
-                self.stop_simulation()
-                self.is_finished = True
-                print("Aircraft left simulation boundaries. Simulation stopped")
-                return True
+        if self._offscreen:
+            self.stop_simulation()
+            self.is_finished = True
+            self.log("Aircraft left simulation boundaries. Simulation stopped")
+            return True
         return False
     
     def cause_collision(self) -> None:
         """Test method allowing to crash second aircraft into the first"""
         if len(self.aircrafts) >= 2:
-            aircraft = self.aircrafts[1]
-            target_aircraft = self.aircrafts[0]
-            delta_x = target_aircraft.position.x() - aircraft.position.x()
-            delta_y = target_aircraft.position.y() - aircraft.position.y()
-            angle_rad = atan2(delta_y, delta_x)
-            angle_deg = degrees(angle_rad)
-            angle_deg %= 360
-            aircraft.course = angle_deg
+            positions = self._state["position"]
+            delta_x, delta_y = positions[0] - positions[1]
+            self.aircrafts[1].course = degrees(atan2(delta_y, delta_x)) % 360
             return
 
-    def render_scene(self) -> None:
-        """Render the scene with aircrafts as circles, bounding box and ruler marks"""
-        fps : float = self.gui_fps_counter.count_frame()
-        self.scene.clear()
-
-        bounding_box = QGraphicsRectItem(0, 0, self.bounding_box_resolution[0], self.bounding_box_resolution[1])
-        self.scene.addItem(bounding_box)
+    def create_scene_items(self) -> None:
+        """Creates scene items which are not bound to any aircraft"""
+        self._bounding_box_item = QGraphicsRectItem(0, 0, self.bounding_box_resolution[0], self.bounding_box_resolution[1])
+        self.scene.addItem(self._bounding_box_item)
 
+        # ruler marks never change, so all of them are drawn by a single path item
+        ruler_path = QPainterPath()
+        self._ruler_text_items : list[QGraphicsSimpleTextItem] = []
         for x in range(100, self.resolution[0], 100):
-            ruler_mark = QGraphicsLineItem(x, 0, x, 10)
-            self.scene.addItem(ruler_mark)
+            ruler_path.moveTo(x, 0)
+            ruler_path.lineTo(x, 10)
             text_item = QGraphicsSimpleTextItem(str(x))
             text_item.setPos(x - 10, -25)
-            self.scene.addItem(text_item)
+            self._ruler_text_items.append(text_item)
 
         for y in range(100, self.resolution[1], 100):
-            ruler_mark = QGraphicsLineItem(0, y, 10, y)
-            self.scene.addItem(ruler_mark)
+            ruler_path.moveTo(0, y)
+            ruler_path.lineTo(10, y)
             text_item = QGraphicsSimpleTextItem(str(y))
             text_item.setPos(-25, y - 10)
-            self.scene.addItem(text_item)
+            self._ruler_text_items.append(text_item)
+        self._ruler_path_item = QGraphicsPathItem(ruler_path)
+        self.scene.addItem(self._ruler_path_item)
+        for item in self._ruler_text_items:
+            self.scene.addItem(item)
+
+        # lines and circles are drawn by single item above aircrafts, with some margin outside the scene that stays visible
+        self._overlay_item = OverlayItem(QRectF(-50, -50, self.resolution[0] + 100, self.resolution[1] + 100))
+        self._overlay_item.setZValue(1)
+        self.scene.addItem(self._overlay_item)
+
+        self._version_item = QGraphicsSimpleTextItem()
+        self._version_item.setPos(30, 30)
+        self._gui_fps_item = QGraphicsSimpleTextItem()
+        self._gui_fps_item.setPos(self.bounding_box_resolution[0] - 80, self.bounding_box_resolution[1] - 40)
+        self._simulation_fps_item = QGraphicsSimpleTextItem()
+        self._simulation_fps_item.setPos(self.bounding_box_resolution[0] - 80, self.bounding_box_resolution[1] - 20)
+        self._collision_label_item = QGraphicsSimpleTextItem()
+        self._collision_label_item.setPos(self.bounding_box_resolution[0] - 110, 30)
+        self._stopped_label_item = QGraphicsSimpleTextItem("Simulation stopped")
+        self._stopped_label_item.setPos(self.bounding_box_resolution[0] - 110, 50)
+        self._log_item = QGraphicsSimpleTextItem()
+        self._log_item.setPos(30, self.bounding_box_resolution[1] - 20 * self.log_lines)
+        for item in (self._version_item, self._gui_fps_item, self._simulation_fps_item, self._collision_label_item, self._stopped_label_item, self._log_item):
+            self.scene.addItem(item)
 
-        if len(self.aircrafts) == 2 and self.aircrafts[0].safezone_occupied or self.aircrafts[1].safezone_occupied:
-            relative_line = QGraphicsLineItem(
-                self.aircrafts[0].position.x(),
-                self.aircrafts[0].position.y(),
-                self.aircrafts[1].position.x(),
-                self.aircrafts[1].position.y())
-            relative_line.setPen(QPen(Qt.GlobalColor.green))
-            self.scene.addItem(relative_line)
+        self.view.setSceneRect(0, 0, *self.resolution)
+        return
+
+    def create_aircraft_items(self) -> None:
+        """Replaces scene items representing aircrafts with ones matching current aircrafts"""
+        for item in self._aircraft_items:
+            self.scene.removeItem(item)
+            self._text_keys.pop(item, None)
+
+        self._ac_pixmaps : list[QGraphicsPixmapItem] = []
+        self._ac_info_texts : list[QGraphicsSimpleTextItem] = []
+        self._ac_paths : list[QPolygonF] = []
+        self._ac_path_ends : list[QPointF | None] = [] # last path point in each path polyline
+        self._ac_arrowheads : list[QPolygonF] = []
+        self._aircraft_items = []
 
         for aircraft in self.aircrafts:
+            aircraft_pixmap = QGraphicsPixmapItem(self._scaled_pixmap)
+            aircraft_pixmap.setTransformOriginPoint(20.0, 20.0)
+            self._ac_pixmaps.append(aircraft_pixmap)
+            self._ac_info_texts.append(QGraphicsSimpleTextItem())
+            self._ac_paths.append(QPolygonF())
+            self._ac_path_ends.append(None)
+
+            # arrowhead pointing up around origin, rotated and moved to speed vector end every frame
+            arrowhead_size = aircraft.size / 3
+            arrowhead_height = arrowhead_size * sqrt(3) / 2
+            polygon = QPolygonF()
+            polygon.append(QPointF(-arrowhead_size / 2, arrowhead_height / 3))
+            polygon.append(QPointF(arrowhead_size / 2, arrowhead_height / 3))
+            polygon.append(QPointF(0, -2 * arrowhead_height / 3))
+            self._ac_arrowheads.append(polygon)
+
+            self._aircraft_items += [self._ac_pixmaps[-1], self._ac_info_texts[-1]]
+
+        for item in self._aircraft_items:
+            self.scene.addItem(item)
+        return
+
+    def render_scene(self) -> None:
+        """Render the scene with state of simulation locked against simulation thread"""
+        with QMutexLocker(self.state_mutex):
+            self.update_scene_items()
+        return
+
+    def update_scene_items(self) -> None:
+        """Updates persistent items of aircrafts and refills the overlay drawn over them"""
+        fps : float = self.gui_fps_counter.count_frame() if self.debug else 0.0 # displayed in debug mode only
+        overlay = self._overlay_item
+        overlay.clear()
+
+        if len(self.aircrafts) == 2 and self.aircrafts[0].safezone_occupied or self.aircrafts[1].safezone_occupied:
+            overlay.add_line(self._relative_line_pen, QLineF(self.aircrafts[0].position, self.aircrafts[1].position))
+
+        self.update_text(self._version_item, self.debug, lambda: "DEBUG" if self.debug else "RELEASE")
+        for item in (self._gui_fps_item, self._simulation_fps_item, self._collision_label_item, self._log_item):
+            item.setVisible(self.debug)
+        self._stopped_label_item.setVisible(self.debug and self.is_stopped)
+        if self.debug:
+            # fps, changing twice a second at most as counted over half a second
+            simulation_fps = self.current_simulation_fps
+            self.update_text(self._gui_fps_item, fps, lambda: "Gui FPS: {:.2f}".format(fps))
+            self.update_text(self._simulation_fps_item, simulation_fps, lambda: "Sim FPS: {:.2f}".format(simulation_fps))
+
+            # toggled values labels
+            self.update_text(self._collision_label_item, self.cause_crash_second, lambda: "Cause collision: {}".format("Yes" if self.cause_crash_second else "No"))
+
+            # latest simulation events
+            self.update_text(self._log_item, self._log_count, lambda: "\n".join(islice(self._log, max(0, len(self._log) - self.log_lines), None)))
+
+        for i, aircraft in enumerate(self.aircrafts):
+            position = aircraft.position
+
             # aircraft representation
-            aircraft_pixmap = QGraphicsPixmapItem(self.aircraft_image.scaled(40, 40))
-            aircraft_pixmap.setPos(aircraft.position.x(), aircraft.position.y())
-            aircraft_pixmap.setScale(1)
-
-            transform = QTransform()
-            transform.rotate(aircraft.yaw_angle + 90)
-            transform.translate(-20.0, -20.0)
-            aircraft_pixmap.setTransform(transform)
-
-            if aircraft.safezone_occupied:
-                aircraft_pixmap.setOpacity(0.6)
-            self.scene.addItem(aircraft_pixmap)
-
-            if self.debug:
-                # version label
-                version_item = QGraphicsSimpleTextItem("DEBUG")
-                version_item.setPos(30, 30)
-                self.scene.addItem(version_item)
-
-                # gui fps
-                gui_fps_text = "Gui FPS: {:.2f}".format(fps)
-                gui_fps_item = QGraphicsSimpleTextItem(gui_fps_text)
-                gui_fps_item.setPos(self.bounding_box_resolution[0] - 80, self.bounding_box_resolution[1] - 40)
-                self.scene.addItem(gui_fps_item)
-
-                # simulation fps
-                simulation_fps_text = "Sim FPS: {:.2f}".format(self.current_simulation_fps)
-                simulation_fps_item = QGraphicsSimpleTextItem(simulation_fps_text)
-                simulation_fps_item.setPos(self.bounding_box_resolution[0] - 80, self.bounding_box_resolution[1] - 20)
-                self.scene.addItem(simulation_fps_item)
-
-                # toggled values labels
-                text_label = "Cause collision: {}".format("Yes" if self.cause_crash_second else "No")
-                collision_text_item = QGraphicsSimpleTextItem(text_label)
-                collision_text_item.setPos(self.bounding_box_resolution[0] - 110, 30)
-                self.scene.addItem(collision_text_item)
-                if self.is_stopped:
-                    text_label = "Simulation stopped"
-                    simulation_label = QGraphicsSimpleTextItem(text_label)
-                    simulation_label.setPos(self.bounding_box_resolution[0] - 110, 50)
-                    self.scene.addItem(simulation_label)
-
-                # hitbox representation
-                if self.display_hitboxes:
-                    aircraft_circle = QGraphicsEllipseItem(
-                        aircraft.position.x() - aircraft.size / 2,
-                        aircraft.position.y() - aircraft.size / 2,
-                        aircraft.size,
-                        aircraft.size)
-                    self.scene.addItem(aircraft_circle)
-
-                # info label
-                if self.display_aircraft_info:
-                    info_text = f"id: {aircraft.aircraft_id}\nx: {aircraft.position.x():.2f}\ny: {aircraft.position.y():.2f}\nspeed: {aircraft.speed:.2f}\ndistance: {aircraft.distance_covered:.1f}\ncourse: {aircraft.course:.1f}\nyaw: {aircraft.yaw_angle:.1f}"
-                    text_item = QGraphicsSimpleTextItem(info_text)
-                    if self.display_aircraft_info == 1:
-                        text_item.setPos(-80 + 110 * (aircraft.aircraft_id + 1), 60)
-                    elif self.display_aircraft_info == 2:
-                        text_item.setPos(aircraft.position.x() -100, aircraft.position.y() -100)
-                    self.scene.addItem(text_item)
-
-                # travelled path
-                if self.display_paths:
-                    length = len(aircraft.path)
-                    if length > 1:
-                        for i in range(length - 1)[::-1]: # loop backwards
-                            # prevent lag
-                            if length - i > 100:
-                                break
-                            point1 = aircraft.path[i]
-                            point2 = aircraft.path[i + 1]
-                            path_line = QGraphicsLineItem(point1.x(), point1.y(), point2.x(), point2.y())
-                            pen : QPen
-                            if aircraft.aircraft_id == 0:
-                                pen = QPen(Qt.GlobalColor.magenta)
-                            elif aircraft.aircraft_id == 1:
-                                pen = QPen(Qt.GlobalColor.blue)
-                            else:
-                                pen = QPen(Qt.GlobalColor.cyan)
-                            pen.setWidth(1)
-                            path_line.setPen(pen)
-                            self.scene.addItem(path_line)
-
-                # safezone around the aircraft
-                if self.display_safezone:
-                    aircraft_safezone_circle = QGraphicsEllipseItem(
-                        aircraft.position.x() - aircraft.safezone_size / 2,
-                        aircraft.position.y() - aircraft.safezone_size / 2,
-                        aircraft.safezone_size,
-                        aircraft.safezone_size)
-                    self.scene.addItem(aircraft_safezone_circle)
-
-                # speed vector
-                if self.display_speed_vectors:
-                    speed_vector = aircraft.get_speed_vector()
-                    speed_vector_end = QPointF(
-                        aircraft.position.x() + speed_vector.x() * aircraft.size, # aircraft size is scale
-                        aircraft.position.y() + speed_vector.y() * aircraft.size)
-                    speed_vector_line = QGraphicsLineItem(
-                        aircraft.position.x(),
-                        aircraft.position.y(),
-                        speed_vector_end.x(),
-                        speed_vector_end.y()
-                    )
-                    speed_vector_line.setPen(QPen(Qt.GlobalColor.blue))
-                    self.scene.addItem(speed_vector_line)
-
-                    # arrowhead
-                    arrowhead_size = aircraft.size / 3
-                    arrowhead_height = arrowhead_size * sqrt(3) / 2
-                    polygon = QPolygonF()
-                    polygon.append(
-                        QPointF(
-                            speed_vector_end.x() -arrowhead_size / 2,
-                            speed_vector_end.y() + arrowhead_height / 3
-                            )
-                    )
-                    polygon.append(
-                        QPointF(
-                            speed_vector_end.x() + arrowhead_size / 2,
-                            speed_vector_end.y() + arrowhead_height / 3
-                        )
-                    )
-                    polygon.append(
-                        QPointF(
-                            speed_vector_end.x(),
-                            speed_vector_end.y() - 2 * arrowhead_height / 3
-                        )
-                    )
-                    arrowhead = QGraphicsPolygonItem(polygon)
-                    transform = QTransform()
-                    transform.translate(
+            aircraft_pixmap = self._ac_pixmaps[i]
+            aircraft_pixmap.setPos(position.x() - 20.0, position.y() - 20.0)
+            aircraft_pixmap.setRotation(aircraft.yaw_angle + 90)
+            aircraft_pixmap.setOpacity(0.6 if aircraft.safezone_occupied else 1.0)
+
+            # info label
+            text_item = self._ac_info_texts[i]
+            text_item.setVisible(self.debug and bool(self.display_aircraft_info))
+            if text_item.isVisible():
+                # rounded as displayed, so text is formatted only when its visible value changes
+                info_key = (
+                    round(position.x(), 2),
+                    round(position.y(), 2),
+                    round(aircraft.speed, 2),
+                    round(aircraft.distance_covered, 1),
+                    round(aircraft.course, 1),
+                    round(aircraft.yaw_angle, 1))
+                self.update_text(text_item, info_key, lambda: f"id: {aircraft.aircraft_id}\nx: {position.x():.2f}\ny: {position.y():.2f}\nspeed: {aircraft.speed:.2f}\ndistance: {aircraft.distance_covered:.1f}\ncourse: {aircraft.course:.1f}\nyaw: {aircraft.yaw_angle:.1f}")
+                if self.display_aircraft_info == 1:
+                    text_item.setPos(-80 + 110 * (aircraft.aircraft_id + 1), 60)
+                elif self.display_aircraft_info == 2:
+                    text_item.setPos(position.x() -100, position.y() -100)
+
+            if not self.debug:
+                continue
+
+            # hitbox representation
+            if self.display_hitboxes:
+                overlay.add_ellipse(QRectF(position.x() - aircraft.size / 2, position.y() - aircraft.size / 2, aircraft.size, aircraft.size))
+
+            # travelled path
+            if self.display_paths:
+                if aircraft.path and aircraft.path[-1] is not self._ac_path_ends[i]:
+                    self._ac_path_ends[i] = aircraft.path[-1]
+                    self._ac_paths[i] = QPolygonF(list(aircraft.path))
+                if self._ac_paths[i].size() > 1:
+                    overlay.add_polyline(self._path_pens.get(aircraft.aircraft_id, self._path_pens["default"]), self._ac_paths[i])
+
+            # safezone around the aircraft
+            if self.display_safezone:
+                overlay.add_ellipse(QRectF(
+                    position.x() - aircraft.safezone_size / 2,
+                    position.y() - aircraft.safezone_size / 2,
+                    aircraft.safezone_size,
+                    aircraft.safezone_size))
+
+            # speed vector
+            if self.display_speed_vectors:
+                speed_vector = aircraft.get_speed_vector()
+                speed_vector_end = QPointF(
+                    position.x() + speed_vector.x() * aircraft.size, # aircraft size is scale
+                    position.y() + speed_vector.y() * aircraft.size)
+                overlay.add_line(self._speed_vector_pen, QLineF(position, speed_vector_end))
+
+                # arrowhead
+                transform = QTransform()
+                transform.translate(speed_vector_end.x(), speed_vector_end.y())
+                transform.rotate(aircraft.yaw_angle + 90)
+                overlay.add_polygon(transform.map(self._ac_arrowheads[i]))
+
+                # negative opponent's speed vector
+                if len(self.aircrafts) == 2:
+                    opponent_speed_vector : QVector2D = self.aircrafts[1 - aircraft.aircraft_id].get_speed_vector()
+                    overlay.add_line(self._opponent_vector_pen, QLineF(
                         speed_vector_end.x(),
-                        speed_vector_end.y()
-                    )
-                    transform.rotate(aircraft.yaw_angle + 90)
-                    transform.translate(
-                        -speed_vector_end.x(),
-                        -speed_vector_end.y()
-                    )
-                    arrowhead.setTransform(transform)
-                    self.scene.addItem(arrowhead)
-
-                    # negative opponent's speed vector
-                    if len(self.aircrafts) == 2:
-                        opponent_speed_vector : QVector2D = self.aircrafts[1 - aircraft.aircraft_id].get_speed_vector()
-                        opponent_speed_vector_negative = QVector2D(-opponent_speed_vector.x(), -opponent_speed_vector.y())
-                        opponent_speed_vector_negative_end = QPointF(
-                            speed_vector_end.x() + opponent_speed_vector_negative.x() * aircraft.size, # aircraft size is scale
-                            speed_vector_end.y() + opponent_speed_vector_negative.y() * aircraft.size
-                        )
-                        opponent_speed_vector_negative_line = QGraphicsLineItem(
-                            speed_vector_end.x(),
-                            speed_vector_end.y(),
-                            opponent_speed_vector_negative_end.x(),
-                            opponent_speed_vector_negative_end.y()
-                        )
-                        opponent_speed_vector_negative_line.setPen(QPen(Qt.GlobalColor.red))
-                        self.scene.addItem(opponent_speed_vector_negative_line)
-
-                        
-
-
-                # angles of movement
-                if self.display_yaw_trajectory:
-                    yaw_angle_line = QGraphicsLineItem(
-                        aircraft.position.x(),
-                        aircraft.position.y(),
-                        aircraft.position.x() + 1000 * cos(radians(aircraft.yaw_angle)),
-                        aircraft.position.y() + 1000 * sin(radians(aircraft.yaw_angle)))
-                    yaw_angle_line.setPen(QPen(Qt.GlobalColor.red))
-                    self.scene.addItem(yaw_angle_line)
-                if self.display_course_trajectory:
-                    course_line = QGraphicsLineItem(
-                        aircraft.position.x(),
-                        aircraft.position.y(),
-                        aircraft.position.x() + 1000 * cos(radians(aircraft.course)),
-                        aircraft.position.y() + 1000 * sin(radians(aircraft.course)))
-                    if aircraft.course % 45 == 0 and not aircraft.course % 90 == 0:
-                        course_line.setPen(QPen(Qt.GlobalColor.green))
-                    self.scene.addItem(course_line)
-            else:
-                version_item = QGraphicsSimpleTextItem("RELEASE")
-                version_item.setPos(30, 30)
-                self.scene.addItem(version_item)
-
-        self.view.setScene(self.scene)
-        self.view.setSceneRect(0, 0, *self.resolution)
+                        speed_vector_end.y(),
+                        speed_vector_end.x() - opponent_speed_vector.x() * aircraft.size, # aircraft size is scale
+                        speed_vector_end.y() - opponent_speed_vector.y() * aircraft.size
+                    ))
+
+            # angles of movement
+            if self.display_yaw_trajectory:
+                overlay.add_line(self._yaw_pen, QLineF(
+                    position.x(),
+                    position.y(),
+                    position.x() + 1000 * aircraft.cos_yaw,
+                    position.y() + 1000 * aircraft.sin_yaw))
+            if self.display_course_trajectory:
+                cos_course, sin_course = aircraft.get_course_direction()
+                course_pen = self._course_pen
+                if aircraft.course % 45 == 0 and not aircraft.course % 90 == 0:
+                    course_pen = self._diagonal_course_pen
+                overlay.add_line(course_pen, QLineF(
+                    position.x(),
+                    position.y(),
+                    position.x() + 1000 * cos_course,
+                    position.y() + 1000 * sin_course))
+        overlay.update()
         return
 
+    def closeEvent(self, event) -> None:
+        """Qt method that finishes simulation thread before closing the window"""
+        self._simulation_thread.quit()
+        self._simulation_thread.wait()
+        return super().closeEvent(event)
+
     def keyPressEvent(self, event) -> None:
         """Qt method that handles keypress events for steering the aircrafts and simulation state"""
         
-        if QKeySequence(event.key()).toString() == "`":
-            self.debug ^= 1
-        
         # ctrl + button
-        if event.modifiers() and Qt.KeyboardModifier.ControlModifier:
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
             if event.key() == Qt.Key.Key_C:
                 self.close()
         if event.key() == Qt.Key.Key_Escape:
             self.close()
 
+        with QMutexLocker(self.state_mutex):
+            self.handle_key(event.key())
+        return super().keyPressEvent(event)
+
+    def handle_key(self, key : int) -> None:
+        """Applies steering and simulation state changes bound to pressed key"""
+        if QKeySequence(key).toString() == "`":
+            self.debug ^= 1
+
         if not self.debug:
-            return super().keyPressEvent(event)
-        
-        # first aircraft steering
-        if len(self.aircrafts) >= 1:
-            if event.key() == Qt.Key.Key_D:
-                self.aircrafts[0].course = 0
-            elif event.key() == Qt.Key.Key_S:
-                self.aircrafts[0].course = 90
-            elif event.key() == Qt.Key.Key_A:
-                self.aircrafts[0].course = 180
-            elif event.key() == Qt.Key.Key_W:
-                self.aircrafts[0].course = 270
-            elif event.key() == Qt.Key.Key_F2:
-                if self.aircrafts[0].set_speed > 1:
-                    self.aircrafts[0].set_speed -= 1
-            elif event.key() == Qt.Key.Key_F3:
-                self.aircrafts[0].set_speed += 1
-            elif event.key() == Qt.Key.Key_Y:
-                course = self.aircrafts[0].course
-                course -= self.aircrafts[0].max_course_change * 2
-                if course < 0:
-                    course += 360
-                self.aircrafts[0].course = course
-            elif event.key() == Qt.Key.Key_U:
-                course = self.aircrafts[0].course
-                course += self.aircrafts[0].max_course_change * 2
-                if course >= 360:
-                    course -= 360
-                self.aircrafts[0].course = course
-        
-        # second aircraft steering
-        if len(self.aircrafts) >= 2:
-            if event.key() == Qt.Key.Key_L:
-                self.aircrafts[1].course = 0
-            elif event.key() == Qt.Key.Key_K:
-                self.aircrafts[1].course = 90
-            elif event.key() == Qt.Key.Key_J:
-                self.aircrafts[1].course = 180
-            elif event.key() == Qt.Key.Key_I:
-                self.aircrafts[1].course = 270
-            elif event.key() == Qt.Key.Key_F6:
-                if self.aircrafts[1].set_speed > 1:
-                    self.aircrafts[1].set_speed -= 1
-            elif event.key() == Qt.Key.Key_F7:
-                self.aircrafts[1].set_speed += 1
-            elif event.key() == Qt.Key.Key_O:
-                course = self.aircrafts[1].course
-                course -= self.aircrafts[1].max_course_change * 2
-                if course < 0:
-                    course += 360
-                self.aircrafts[1].course = course
-            elif event.key() == Qt.Key.Key_P:
-                course = self.aircrafts[1].course
-                course += self.aircrafts[1].max_course_change * 2
-                if course >= 360:
-                    course -= 360
-                self.aircrafts[1].course = course
-        
-        # shortcuts for every case
-        if event.key() == Qt.Key.Key_R:
-            self.stop_simulation()
+            return
+
+        action = self._keymap.get(key)
+        if action:
+            action()
+        return
+
+    def create_keymap(self) -> dict[int, Callable[[], None]]:
+        """Returns actions bound to keys, available in debug mode only"""
+        return {
+            # first aircraft steering
+            Qt.Key.Key_D: lambda: self.set_course(0, 0),
+            Qt.Key.Key_S: lambda: self.set_course(0, 90),
+            Qt.Key.Key_A: lambda: self.set_course(0, 180),
+            Qt.Key.Key_W: lambda: self.set_course(0, 270),
+            Qt.Key.Key_F2: lambda: self.change_speed(0, -1),
+            Qt.Key.Key_F3: lambda: self.change_speed(0, 1),
+            Qt.Key.Key_Y: lambda: self.change_course(0, -1),
+            Qt.Key.Key_U: lambda: self.change_course(0, 1),
+
+            # second aircraft steering
+            Qt.Key.Key_L: lambda: self.set_course(1, 0),
+            Qt.Key.Key_K: lambda: self.set_course(1, 90),
+            Qt.Key.Key_J: lambda: self.set_course(1, 180),
+            Qt.Key.Key_I: lambda: self.set_course(1, 270),
+            Qt.Key.Key_F6: lambda: self.change_speed(1, -1),
+            Qt.Key.Key_F7: lambda: self.change_speed(1, 1),
+            Qt.Key.Key_O: lambda: self.change_course(1, -1),
+            Qt.Key.Key_P: lambda: self.change_course(1, 1),
+
+            # shortcuts for every case
+            Qt.Key.Key_R: self.restart_simulation,
+            Qt.Key.Key_Slash: self.toggle_simulation,
+            Qt.Key.Key_1: self.cycle_aircraft_info,
+            Qt.Key.Key_2: lambda: self.toggle("display_program_info"),
+            Qt.Key.Key_3: lambda: self.toggle("display_course_trajectory"),
+            Qt.Key.Key_4: lambda: self.toggle("display_yaw_trajectory"),
+            Qt.Key.Key_5: lambda: self.toggle("display_safezone"),
+            Qt.Key.Key_6: lambda: self.toggle("display_paths"),
+            Qt.Key.Key_7: lambda: self.toggle("cause_crash_second"),
+            Qt.Key.Key_8: lambda: self.toggle("display_hitboxes"),
+            Qt.Key.Key_9: lambda: self.toggle("display_speed_vectors")
+        }
+
+    def set_course(self, aircraft_id : int, course : float) -> None:
+        """Sets course of given aircraft"""
+        if aircraft_id < len(self.aircrafts):
+            self.aircrafts[aircraft_id].course = course
+        return
+
+    def change_course(self, aircraft_id : int, direction : int) -> None:
+        """Turns course of given aircraft by small iterator, clockwise for positive direction"""
+        if aircraft_id < len(self.aircrafts):
+            aircraft = self.aircrafts[aircraft_id]
+            course = aircraft.course + direction * aircraft.max_course_change * 2
+            if course < 0:
+                course += 360
+            elif course >= 360:
+                course -= 360
+            aircraft.course = course
+        return
+
+    def change_speed(self, aircraft_id : int, change : float) -> None:
+        """Changes set speed of given aircraft, keeping it above 1"""
+        if aircraft_id < len(self.aircrafts):
+            aircraft = self.aircrafts[aircraft_id]
+            if change > 0 or aircraft.set_speed > 1:
+                aircraft.set_speed += change
+        return
+
+    def restart_simulation(self) -> None:
+        """Resets and starts the simulation again"""
+        self.stop_simulation()
+        self.reset_simulation()
+        self.start_simulation()
+        return
+
+    def toggle_simulation(self) -> None:
+        """Pauses or resumes the simulation, restarts it once finished"""
+        if not self.is_finished:
+            if self.is_stopped:
+                self.start_simulation()
+            else:
+                self.stop_simulation()
+        else:
             self.reset_simulation()
             self.start_simulation()
-        elif event.key() == Qt.Key.Key_T:
-            self.reset_flags()
-        elif event.key() == Qt.Key.Key_Slash:
-            if not self.is_finished:
-                if self.is_stopped:
-                    self.start_simulation()
-                else:
-                    self.stop_simulation()
-            else:
-                self.reset_simulation()
-                self.start_simulation()
-        elif event.key() == Qt.Key.Key_1:
-            value = self.display_aircraft_info + 1
-            if value > 2:
-                value = 0
-            self.display_aircraft_info = value
-        elif event.key() == Qt.Key.Key_2:
-            self.display_program_info ^= 1
-        elif event.key() == Qt.Key.Key_3:
-            self.display_course_trajectory ^= 1
-        elif event.key() == Qt.Key.Key_4:
-            self.display_yaw_trajectory ^= 1
-        elif event.key() == Qt.Key.Key_5:
-            self.display_safezone ^= 1
-        elif event.key() == Qt.Key.Key_6:
-            self.display_paths ^= 1
-        elif event.key() == Qt.Key.Key_7:
-            self.cause_crash_second ^= 1
-        elif event.key() == Qt.Key.Key_8:
-            self.display_hitboxes ^= 1
-        elif event.key() == Qt.Key.Key_9:
-            self.display_speed_vectors ^= 1
+        return
 
-        return super().keyPressEvent(event)
+    def cycle_aircraft_info(self) -> None:
+        """Switches aircraft info between hidden, top left and below aircraft"""
+        value = self.display_aircraft_info + 1
+        if value > 2:
+            value = 0
+        self.display_aircraft_info = value
+        return
+
+    def toggle(self, flag : str) -> None:
+        """Toggles value of given display or behaviour flag"""
+        setattr(self, flag, getattr(self, flag) ^ 1)
+        return